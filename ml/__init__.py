@@ -0,0 +1,5 @@
+# ml
+"""
+Trening, scoring i pipeline. Skripte se pokreću izravno (python ml/pipeline.py),
+a web app i scraper koriste samo zajedničku normalizaciju: from ml.normalize import ...
+"""
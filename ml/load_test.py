@@ -0,0 +1,221 @@
+# load_test.py
+"""
+Offline load test for the scoring endpoint (score2.init/run).
+
+Starts the local scoring server from score2.py in-process (or targets --url),
+sends realistic payloads sampled from the training CSV and sweeps
+concurrency x batch size. Results (throughput, p50/p95/p99, error rate)
+are written to a JSON file.
+
+    python ml/load_test.py --concurrency 1,4,16 --batch-sizes 1,10,100
+    python ml/load_test.py --baseline load_test_prev.json   # fail on regression
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = "njuskalo_osijek_regija_auti_5000_2_fixed.csv"
+# Year (novi scraper / registry dataset) ili Age (stari CSV); score2 iz Year računa Age
+FEATURES = ["Brand", "Model", "Transmission", "Year", "Age", "Mileage", "Power_kW"]
+
+# Fallback ako CSV nije dostupan (ista shema kao trening set)
+SYNTHETIC_MODELS = {
+    "Volkswagen": ["Golf", "Passat", "Polo", "Tiguan"],
+    "Opel": ["Astra", "Corsa", "Insignia"],
+    "Škoda": ["Octavia", "Fabia", "Superb"],
+    "BMW": ["320", "520", "X3"],
+    "Renault": ["Clio", "Megane"],
+}
+TRANSMISSIONS = ["Mehanički mjenjač", "Automatski"]
+
+PAYLOADS_PER_BATCH_SIZE = 50
+
+
+def load_rows(path: str, seed: int) -> pd.DataFrame:
+    """Feature rows to sample payloads from (CSV if present, else synthetic)."""
+    if path and os.path.exists(path):
+        df = pd.read_csv(path)
+        df.columns = [c.strip() for c in df.columns]
+        cols = [c for c in FEATURES if c in df.columns]
+        return df[cols].dropna().reset_index(drop=True)
+
+    rng = np.random.default_rng(seed)
+    n = 5000
+    brands = rng.choice(list(SYNTHETIC_MODELS), n)
+    return pd.DataFrame({
+        "Brand": brands,
+        "Model": [rng.choice(SYNTHETIC_MODELS[b]) for b in brands],
+        "Transmission": rng.choice(TRANSMISSIONS, n),
+        "Age": rng.integers(1, 25, n),
+        "Mileage": rng.integers(5_000, 350_000, n),
+        "Power_kW": rng.integers(40, 200, n),
+    })
+
+
+def build_payloads(rows: pd.DataFrame, batch_size: int, seed: int) -> list:
+    """Pre-encoded request bodies, so payload building is not timed."""
+    bodies = []
+    for i in range(PAYLOADS_PER_BATCH_SIZE):
+        sample = rows.sample(n=batch_size, replace=True, random_state=seed + i)
+        records = json.loads(sample.to_json(orient="records"))
+        bodies.append(json.dumps({"data": records}).encode("utf-8"))
+    return bodies
+
+
+def _send(url: str, body: bytes, timeout: float):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            ok = "error" not in json.loads(resp.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        ok = False
+    return time.perf_counter() - t0, ok
+
+
+def run_point(url: str, bodies: list, concurrency: int, n_requests: int, timeout: float) -> dict:
+    """One sweep point: n_requests spread over `concurrency` client threads."""
+    def job(i):
+        return _send(url, bodies[i % len(bodies)], timeout)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(job, range(n_requests)))
+    wall = time.perf_counter() - t0
+
+    lat = np.array([r[0] for r in results]) * 1000
+    errors = sum(1 for r in results if not r[1])
+    return {
+        "requests": n_requests,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(n_requests / wall, 2),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "error_rate": round(errors / n_requests, 4),
+    }
+
+
+def _stage_means_ms(score2) -> dict:
+    m = score2.metrics
+    return {
+        stage: round(h.sum / h.count * 1000, 3)
+        for stage, h in m.stage_latency.items() if h.count
+    }
+
+
+def start_local_server(model_dir: str):
+    """init() + local server from score2.py on a free port, in a daemon thread."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import score2
+
+    if model_dir:
+        os.environ["AZUREML_MODEL_DIR"] = model_dir
+    score2.init()
+    server = score2.serve("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return score2, server, f"http://{host}:{port}/score"
+
+
+def check_regression(results: list, baseline_path: str, max_regression: float) -> list:
+    """Sweep points whose p95 got worse than baseline by more than max_regression."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["concurrency"], r["batch_size"]): r for r in json.load(f)["results"]}
+
+    failed = []
+    for r in results:
+        old = baseline.get((r["concurrency"], r["batch_size"]))
+        if old and r["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            failed.append(f"c={r['concurrency']} b={r['batch_size']}: p95 {old['p95_ms']} -> {r['p95_ms']} ms")
+    return failed
+
+
+def _int_list(s: str) -> list:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for score2.init/run.")
+    parser.add_argument("--csv", default=DATA_PATH, help="training CSV to sample payloads from")
+    parser.add_argument("--model-dir", default="", help="folder with car_price_pipeline.pkl")
+    parser.add_argument("--url", default="", help="score an already running server instead")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16])
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=200, help="requests per sweep point")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="load_test_results.json")
+    parser.add_argument("--baseline", default="", help="previous results JSON to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    score2 = server = None
+    url = args.url
+    if not url:
+        score2, server, url = start_local_server(args.model_dir)
+
+    rows = load_rows(args.csv, args.seed)
+    print(f"Target: {url} | payload rows: {len(rows)}")
+
+    results = []
+    try:
+        for batch_size in args.batch_sizes:
+            bodies = build_payloads(rows, batch_size, args.seed)
+            for concurrency in args.concurrency:
+                for i in range(args.warmup):
+                    _send(url, bodies[i % len(bodies)], args.timeout)
+                if score2 is not None:
+                    score2.metrics.reset()
+
+                point = {"concurrency": concurrency, "batch_size": batch_size}
+                point.update(run_point(url, bodies, concurrency, args.requests, args.timeout))
+                point["rows_per_s"] = round(point["throughput_rps"] * batch_size, 2)
+                if score2 is not None:
+                    point["stage_mean_ms"] = _stage_means_ms(score2)
+                results.append(point)
+
+                print(
+                    f"c={concurrency:<3} b={batch_size:<5} "
+                    f"{point['throughput_rps']:>8.1f} req/s  "
+                    f"p50={point['p50_ms']:.1f}  p95={point['p95_ms']:.1f}  p99={point['p99_ms']:.1f} ms  "
+                    f"err={point['error_rate']:.2%}"
+                )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": args.url or "in-process score2",
+        "csv": args.csv if os.path.exists(args.csv) else "synthetic",
+        "requests_per_point": args.requests,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Rezultati spremljeni -> {args.out}")
+
+    if args.baseline:
+        failed = check_regression(results, args.baseline, args.max_regression)
+        if failed:
+            print("❌ Regresija performansi:")
+            for line in failed:
+                print("   " + line)
+            sys.exit(1)
+        print("✅ Nema regresije u odnosu na baseline.")
+
+
+if __name__ == "__main__":
+    main()
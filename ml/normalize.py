@@ -0,0 +1,262 @@
+# normalize.py
+"""
+Zajednička normalizacija značajki za scraper, trening, scoring i web app.
+
+- Age se ne sprema: scraper sprema godinu proizvodnje (Year), a Age se računa
+  tek kad se podaci koriste (age_from_year), pa ne "stari" sa CSV-om.
+- Brand/Model/Transmission idu kroz fiksni rječnik (Vocabulary) s internanim
+  kanonskim nazivima: "VW", " volkswagen", "VOLKSWAGEN" -> "Volkswagen".
+  Rječnik je čista funkcija (ne uči iz podataka), pa trening i scoring uvijek
+  daju isti zapis. Marke i mjenjači izvan rječnika samo se očiste od razmaka;
+  modeli izvan rječnika idu kroz fiksno pravilo (_model_case): "golf" / "GOLF"
+  -> "Golf", a "CR-V", "RAV4", "ID.3" ostaju kakvi jesu.
+- Sve radi nad cijelim stupcima: string operacije se rade vektorizirano nad
+  jedinstvenim vrijednostima (factorize), a ne redak po redak.
+"""
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+TARGET = "Price_market"
+CAT_COLS = ["Brand", "Model", "Transmission"]
+NUM_COLS = ["Price_market", "Year", "Age", "Mileage", "Power_kW"]
+
+# do ovoliko redova Vocabulary.canonicalize radi vrijednost po vrijednost
+SMALL_BATCH = 64
+
+# Alternativni nazivi stupaca (stari CSV-ovi)
+COLUMN_ALIASES = {
+    "Power (kW)": "Power_kW",
+    "Price": "Price_market",
+    "Godina proizvodnje": "Year",
+}
+
+KNOWN_BRANDS = [
+    "Alfa Romeo", "Audi", "BMW", "Chevrolet", "Chrysler", "Citroën", "Cupra",
+    "Dacia", "Dodge", "DS", "Fiat", "Ford", "Honda", "Hyundai", "Infiniti",
+    "Jaguar", "Jeep", "Kia", "Lancia", "Land Rover", "Lexus", "Mazda",
+    "Mercedes-Benz", "Mini", "Mitsubishi", "Nissan", "Opel", "Peugeot",
+    "Porsche", "Renault", "Saab", "Seat", "Smart", "Subaru", "Suzuki", "Tesla",
+    "Toyota", "Volkswagen", "Volvo", "Škoda",
+]
+BRAND_ALIASES = {
+    "VW": "Volkswagen",
+    "Mercedes": "Mercedes-Benz",
+    "Mercedes Benz": "Mercedes-Benz",
+    "Skoda": "Škoda",
+    "Citroen": "Citroën",
+    "Alfa-Romeo": "Alfa Romeo",
+    "Land-Rover": "Land Rover",
+}
+
+KNOWN_TRANSMISSIONS = ["Mehanički mjenjač", "Automatski", "Automatski sekvencijski", "Polu-automatski"]
+TRANSMISSION_ALIASES = {
+    "Mehanicki mjenjac": "Mehanički mjenjač",
+    "Mehanički": "Mehanički mjenjač",
+    "Manualni": "Mehanički mjenjač",
+    "Ručni": "Mehanički mjenjač",
+    "Automatik": "Automatski",
+    "Automatski mjenjač": "Automatski",
+    "Poluautomatski": "Polu-automatski",
+}
+
+# Modeli čiji zapis _model_case ne bi pogodio (mala/velika slova, crtice, "!")
+KNOWN_MODELS = [
+    "e-Golf", "up!", "e-up!", "ID.3", "ID.4", "ID.5", "T-Roc", "T-Cross", "Eos", "Fox",
+    "CR-V", "HR-V", "C-HR", "RAV4", "iQ", "CX-3", "CX-30", "CX-5", "MX-5", "X-Trail",
+    "Ka", "Ka+", "C-Max", "S-Max", "B-Max", "Grand C-Max", "EcoSport",
+    "Mii", "Uno", "Rio", "Zoe", "cee'd", "Ceed", "XCeed", "ProCeed",
+    "i10", "i20", "i30", "i40", "ix20", "ix35", "e-208", "e-2008",
+    "A-Klasa", "B-Klasa", "C-Klasa", "E-Klasa", "S-Klasa",
+]
+MODEL_ALIASES = {
+    "Up": "up!",
+    "A klasa": "A-Klasa",
+    "B klasa": "B-Klasa",
+    "C klasa": "C-Klasa",
+    "E klasa": "E-Klasa",
+    "S klasa": "S-Klasa",
+}
+
+
+def _clean(value) -> str:
+    """Trim + jedan razmak između riječi (velika/mala slova ostaju)."""
+    return " ".join(str(value).split())
+
+
+def _key(value) -> str:
+    return _clean(value).casefold()
+
+
+def _model_case(value: str) -> str:
+    """
+    Fiksno pravilo za modele izvan KNOWN_MODELS (ne ovisi o podacima ni redoslijedu):
+    riječi od samih slova -> "Golf" (do 3 slova -> "GTI", "CLS"), riječi sa
+    znamenkama ili interpunkcijom ostaju ("320d", "CR-V", "ID.3").
+    """
+    words = []
+    for w in value.split(" "):
+        if w.isalpha():
+            w = w.upper() if len(w) <= 3 else w[:1].upper() + w[1:].lower()
+        words.append(w)
+    return " ".join(words)
+
+
+class Vocabulary:
+    """
+    Ključ (bez razlike u razmacima i velikim slovima) -> internani kanonski naziv.
+    Fiksan nakon konstrukcije: vrijednosti kojih nema u rječniku idu kroz
+    fallback (čista funkcija, zadano samo očišćeni razmaci) i ništa se ne
+    dodaje (ni u dugotrajnom scoring serveru).
+    """
+
+    def __init__(self, canonical=(), aliases=None, fallback=None):
+        self.fallback = fallback
+        self._lookup = {}
+        for name in canonical:
+            self._lookup[_key(name)] = sys.intern(name)
+        for alias, name in (aliases or {}).items():
+            self._lookup[_key(alias)] = sys.intern(name)
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def __contains__(self, value) -> bool:
+        return _key(value) in self._lookup
+
+    def _unknown(self, cleaned: str) -> str:
+        return self.fallback(cleaned) if self.fallback else cleaned
+
+    def canonical(self, value) -> str:
+        cleaned = _clean(value)
+        found = self._lookup.get(cleaned.casefold())
+        return self._unknown(cleaned) if found is None else found
+
+    def canonicalize(self, s: pd.Series, categorical: bool = False) -> pd.Series:
+        """Cijeli stupac: string operacije samo nad jedinstvenim vrijednostima."""
+        if not categorical and len(s) <= SMALL_BATCH:
+            # scoring (1-50 redova): factorize/regex/Index koštaju više od petlje
+            values = [np.nan if pd.isna(v) else self.canonical(v) for v in s.tolist()]
+            return pd.Series(values, index=s.index, name=s.name, dtype=object)
+
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes = s.cat.codes.to_numpy()
+            uniques = pd.Index(s.cat.categories)
+        else:
+            codes, uniques = pd.factorize(s)
+
+        cleaned = pd.Series(uniques.astype(str)).str.strip().str.replace(r"\s+", " ", regex=True)
+        keys = cleaned.str.casefold()
+
+        canon = []
+        for key, value in zip(keys, cleaned):
+            found = self._lookup.get(key)
+            canon.append(self._unknown(value) if found is None else found)
+
+        # više sirovih zapisa -> isti kanonski: spoji kodove
+        canon_index = pd.Index(canon).unique()
+        remap = canon_index.get_indexer(canon)
+        codes = np.where(codes >= 0, remap[codes] if len(remap) else codes, -1)
+
+        if categorical:
+            return pd.Series(pd.Categorical.from_codes(codes, canon_index), index=s.index, name=s.name)
+
+        values = np.append(np.asarray(canon_index, dtype=object), np.nan)
+        return pd.Series(values[codes], index=s.index, name=s.name, dtype=object)
+
+
+# Zajednički rječnici (isti u svim dijelovima projekta)
+VOCABULARIES = {
+    "Brand": Vocabulary(KNOWN_BRANDS, BRAND_ALIASES),
+    "Model": Vocabulary(KNOWN_MODELS, MODEL_ALIASES, fallback=_model_case),
+    "Transmission": Vocabulary(KNOWN_TRANSMISSIONS, TRANSMISSION_ALIASES),
+}
+
+
+def parse_numeric(s: pd.Series) -> pd.Series:
+    """Brojevi iz stupca; "150.000 km" / "19.900 €" -> samo znamenke (kao to_int u scraperu)."""
+    num = pd.to_numeric(s, errors="coerce")
+    if pd.api.types.is_numeric_dtype(s):
+        return num
+
+    retry = num.isna() & s.notna()
+    if retry.any():
+        digits = s[retry].astype(str).str.replace(r"[^\d]", "", regex=True)
+        num = num.astype(float)
+        num[retry] = pd.to_numeric(digits, errors="coerce")
+    return num
+
+
+def current_year() -> int:
+    return datetime.now().year
+
+
+def age_from_year(year, ref_year: int = None):
+    """Starost u godinama u trenutku korištenja (ne u trenutku scrapea)."""
+    ref_year = current_year() if ref_year is None else ref_year
+    return ref_year - year
+
+
+def year_from_age(age, ref_year: int = None):
+    """Obrnuto od age_from_year (za stare CSV-ove koji imaju samo Age)."""
+    ref_year = current_year() if ref_year is None else ref_year
+    return ref_year - age
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Trim naziva stupaca + stari nazivi -> naši."""
+    if any(isinstance(c, str) and c != c.strip() for c in df.columns):
+        df = df.rename(columns=lambda c: c.strip() if isinstance(c, str) else c)
+    rename = {a: n for a, n in COLUMN_ALIASES.items() if a in df.columns and n not in df.columns}
+    return df.rename(columns=rename) if rename else df
+
+
+def normalize_listings(df: pd.DataFrame, ref_year: int = None, with_age: bool = True, categorical: bool = False) -> pd.DataFrame:
+    """
+    Normalizira oglase (vraća novi DataFrame):
+      - nazivi stupaca, kanonski Brand/Model/Transmission, numerički stupci
+      - with_age: Age = ref_year - Year (Year se makne); bez Year ostaje postojeći Age
+    """
+    df = normalize_columns(df).copy()
+
+    for c in CAT_COLS:
+        if c in df.columns:
+            df[c] = VOCABULARIES[c].canonicalize(df[c], categorical=categorical)
+
+    for c in NUM_COLS:
+        if c in df.columns:
+            df[c] = parse_numeric(df[c])
+
+    if with_age and "Year" in df.columns:
+        df["Age"] = age_from_year(df.pop("Year"), ref_year)
+
+    return df
+
+
+def _encoded_categories(step, columns=None):
+    """(stupac, kategorije) za sve fitane encodere u (Column)Transformeru / Pipelineu."""
+    if hasattr(step, "transformers_"):
+        for _, transformer, cols in step.transformers_:
+            yield from _encoded_categories(transformer, cols)
+    elif hasattr(step, "steps"):
+        for _, sub in step.steps:
+            yield from _encoded_categories(sub, columns)
+    elif hasattr(step, "categories_") and columns is not None:
+        yield from zip(list(columns), step.categories_)
+
+
+def stale_categories(pipeline) -> dict:
+    """
+    {stupac: [vrijednosti]} koje je model vidio u treningu, a normalize_listings ih
+    više ne proizvodi (npr. "Skoda" umjesto "Škoda"): model je treniran prije
+    normalizacije i treba ga ponovno istrenirati.
+    """
+    stale = {}
+    for col, categories in _encoded_categories(pipeline):
+        if col in VOCABULARIES:
+            values = [v for v in categories if isinstance(v, str) and VOCABULARIES[col].canonical(v) != v]
+            if values:
+                stale[col] = values
+    return stale
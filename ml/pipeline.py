@@ -0,0 +1,292 @@
+# pipeline.py
+"""
+scrape -> clean/dedupe -> features -> train -> evaluate -> export
+
+Svaka faza ima fingerprint = hash (koda faze + sadržaja ulaza + parametara).
+Ako je fingerprint isti kao u prošlom pokretanju i izlazi su netaknuti, faza se
+preskače. Ako faza proizvede isti izlaz kao prije (npr. promjena koda u clean
+koja ne mijenja podatke), preskaču se i sve faze iza nje.
+
+Export sprema model, metrike i dataset u lokalni registry:
+
+    registry/
+      models/<verzija>/car_price_pipeline.pkl, metrics.json, dataset.csv, manifest.json
+      current.json   -> zadnja verzija (čitaju je score2.init() i web app)
+
+    python ml/pipeline.py                          # iz postojećeg sirovog CSV-a
+    python ml/pipeline.py --scrape                 # prvo pokreni scraper
+    python ml/pipeline.py --force train            # ponovno treniraj bez obzira na cache
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+import normalize
+import train_model3
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(ML_DIR)
+SCRAPER = os.path.join(ROOT_DIR, "scraping", "njuskalo_scraper.py")
+
+RAW_CSV = "njuskalo_osijek_regija_auti_5000.csv"
+BUILD_DIR = "build"
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY", "registry")
+
+FEATURES = ["Age", "Mileage", "Brand", "Model", "Power_kW", "Transmission"]
+TARGET = train_model3.TARGET
+MIN_PRICE = 500
+
+MODEL_FILE = "car_price_pipeline.pkl"
+
+
+# =========================
+# HASHING
+# =========================
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_hash(*objs) -> str:
+    """Hash izvornog koda funkcija/modula o kojima faza ovisi."""
+    h = hashlib.sha256()
+    for obj in objs:
+        h.update(inspect.getsource(obj).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _fingerprint(data: dict) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# =========================
+# FAZE
+# =========================
+def stage_clean(inputs: dict, out_dir: str) -> dict:
+    """
+    Sirovi CSV -> bez duplikata, bez redova bez ključnih polja, kanonski stringovi.
+    Year ostaje (scraper ga sprema umjesto Age; stari CSV-ovi imaju samo Age).
+    """
+    df = normalize.normalize_listings(pd.read_csv(inputs["raw"]), with_age=False)
+
+    if "url" in df.columns:
+        df = df.drop_duplicates(subset=["url"])
+
+    age_col = "Year" if "Year" in df.columns else "Age"
+    key_cols = [TARGET, age_col] + [c for c in FEATURES if c != "Age"]
+    df = df.dropna(subset=key_cols)
+    df = df[df[TARGET] >= MIN_PRICE]
+    df = df.drop_duplicates(subset=key_cols)
+
+    path = os.path.join(out_dir, "clean.csv")
+    df.to_csv(path, index=False)
+    return {"clean": path}
+
+
+def stage_features(inputs: dict, out_dir: str) -> dict:
+    """Age iz godine proizvodnje (na dan treninga), samo stupci za trening (bez url/title)."""
+    df = normalize.normalize_listings(pd.read_csv(inputs["clean"]), ref_year=PARAMS["ref_year"])
+    df = df[[TARGET] + FEATURES]
+    df = df.astype({"Age": int, "Mileage": int, "Power_kW": int})
+
+    path = os.path.join(out_dir, "features.csv")
+    df.to_csv(path, index=False)
+    return {"features": path}
+
+
+def stage_train(inputs: dict, out_dir: str) -> dict:
+    df = pd.read_csv(inputs["features"])
+    X_train, _, _, y_train, _, _ = train_model3.split_data(df)
+
+    pipeline = train_model3.build_pipeline(X_train)
+    pipeline.fit(X_train, y_train)
+
+    path = os.path.join(out_dir, MODEL_FILE)
+    joblib.dump(pipeline, path)
+    return {"model": path}
+
+
+def stage_evaluate(inputs: dict, out_dir: str) -> dict:
+    df = pd.read_csv(inputs["features"])
+    pipeline = joblib.load(inputs["model"])
+    X_train, X_val, X_test, y_train, y_val, y_test = train_model3.split_data(df)
+
+    metrics = {
+        name: train_model3.compute_metrics(y, pipeline.predict(X))
+        for name, X, y in [("train", X_train, y_train), ("validation", X_val, y_val), ("test", X_test, y_test)]
+    }
+    metrics["rows"] = {"train": len(y_train), "validation": len(y_val), "test": len(y_test)}
+
+    path = os.path.join(out_dir, "metrics.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+
+    t = metrics["test"]
+    print(f"   TEST: MAE={t['mae']:,.0f} € | R²={t['r2']:.4f} | ACC ±2000 €={t['acc_2000']:.1f} %")
+    return {"metrics": path}
+
+
+def stage_export(inputs: dict, out_dir: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    """Kopira artefakte u registry/models/<verzija>/ i postavi current.json."""
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + file_hash(inputs["model"])[:8]
+    target = os.path.join(registry_dir, "models", version)
+    os.makedirs(target, exist_ok=True)
+
+    files = {"model": MODEL_FILE, "metrics": "metrics.json", "dataset": "dataset.csv"}
+    sources = {"model": inputs["model"], "metrics": inputs["metrics"], "dataset": inputs["clean"]}
+    for key, name in files.items():
+        shutil.copyfile(sources[key], os.path.join(target, name))
+
+    manifest = {
+        "version": version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+        "sha256": {key: file_hash(os.path.join(target, name)) for key, name in files.items()},
+    }
+    with open(os.path.join(target, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # current.json zadnji, atomski (score2 / app nikad ne vide pola zapisanu verziju)
+    current = {
+        "version": version,
+        "model": os.path.join("models", version, MODEL_FILE),
+        "metrics": os.path.join("models", version, "metrics.json"),
+        "dataset": os.path.join("models", version, "dataset.csv"),
+    }
+    tmp = os.path.join(registry_dir, "current.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    os.replace(tmp, os.path.join(registry_dir, "current.json"))
+
+    print(f"   📦 Registry: {target}")
+    return {"export": os.path.join(target, "manifest.json")}
+
+
+# (ime, funkcija, ulazi, kod o kojem ovisi)
+STAGES = [
+    ("clean", stage_clean, ["raw"], [stage_clean, normalize]),
+    ("features", stage_features, ["clean"], [stage_features, normalize]),
+    ("train", stage_train, ["features"], [stage_train, train_model3.split_data, train_model3.build_pipeline]),
+    ("evaluate", stage_evaluate, ["features", "model"], [stage_evaluate, train_model3.split_data, train_model3.compute_metrics]),
+    ("export", stage_export, ["model", "metrics", "clean"], [stage_export]),
+]
+
+# parametri koji mijenjaju izlaz (dio fingerprinta)
+# (ref_year: Age se računa na dan treninga -> nova godina = novi features i model)
+PARAMS = {"features": FEATURES, "target": TARGET, "min_price": MIN_PRICE, "ref_year": normalize.current_year()}
+
+
+# =========================
+# RUNNER
+# =========================
+def _load_state(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(path: str, state: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _outputs_intact(outputs: dict, hashes: dict) -> bool:
+    return all(os.path.exists(p) and file_hash(p) == hashes.get(k) for k, p in outputs.items())
+
+
+# state.json čuva putanje relativno na build_dir, pa radi iz bilo kojeg direktorija
+def _to_state(outputs: dict, build_dir: str) -> dict:
+    return {k: os.path.relpath(p, build_dir) for k, p in outputs.items()}
+
+
+def _from_state(outputs: dict, build_dir: str) -> dict:
+    return {k: os.path.normpath(os.path.join(build_dir, p)) for k, p in outputs.items()}
+
+
+def run_scraper():
+    """Scraper je interaktivan (browser, CAPTCHA) pa se pokreće samo na zahtjev."""
+    print(f"\n▶ scrape ({SCRAPER})")
+    subprocess.run([sys.executable, SCRAPER], check=True)
+
+
+def run_pipeline(raw_csv: str = RAW_CSV, build_dir: str = BUILD_DIR, registry_dir: str = REGISTRY_DIR, force=()) -> dict:
+    os.makedirs(build_dir, exist_ok=True)
+    state_path = os.path.join(build_dir, "state.json")
+    state = _load_state(state_path)
+
+    artifacts = {"raw": raw_csv}
+    hashes = {"raw": file_hash(raw_csv)}
+
+    for name, fn, deps, code in STAGES:
+        fingerprint = _fingerprint({
+            "code": code_hash(*code),
+            "inputs": {d: hashes[d] for d in deps},
+            "params": PARAMS,
+            "registry": os.path.abspath(registry_dir) if name == "export" else None,
+        })
+
+        prev = state.get(name)
+        prev_outputs = _from_state(prev["outputs"], build_dir) if prev else {}
+        if (
+            name not in force
+            and prev
+            and prev["fingerprint"] == fingerprint
+            and _outputs_intact(prev_outputs, prev["hashes"])
+        ):
+            print(f"⏭ {name}: nepromijenjeno, preskačem")
+            artifacts.update(prev_outputs)
+            hashes.update(prev["hashes"])
+            continue
+
+        print(f"\n▶ {name}")
+        out_dir = os.path.join(build_dir, name)
+        os.makedirs(out_dir, exist_ok=True)
+
+        t0 = time.perf_counter()
+        inputs = {d: artifacts[d] for d in deps}
+        outputs = fn(inputs, out_dir, registry_dir) if name == "export" else fn(inputs, out_dir)
+        out_hashes = {k: file_hash(p) for k, p in outputs.items()}
+        print(f"   ✅ {name} ({time.perf_counter() - t0:.1f} s)")
+
+        state[name] = {"fingerprint": fingerprint, "outputs": _to_state(outputs, build_dir), "hashes": out_hashes}
+        _save_state(state_path, state)
+
+        artifacts.update(outputs)
+        hashes.update(out_hashes)
+
+    return artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental scrape -> train -> export pipeline.")
+    parser.add_argument("--raw", default=RAW_CSV, help="sirovi CSV iz scrapera")
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--scrape", action="store_true", help="prvo pokreni scraper (interaktivno)")
+    parser.add_argument("--force", nargs="*", default=[], choices=[s[0] for s in STAGES], help="faze koje se uvijek izvrte")
+    args = parser.parse_args()
+
+    if args.scrape:
+        run_scraper()
+
+    run_pipeline(args.raw, args.build_dir, args.registry, force=set(args.force))
+    print("\n🎉 Pipeline gotov.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,196 @@
 # score.py
+import argparse
+import cProfile
+import io
 import json
 import os
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import numpy as np
 import pandas as pd
 import joblib
 
+# shared feature normalization (deploy together with this file)
+from normalize import normalize_listings, stale_categories
+
+
+# ======================
+# Metrics settings
+# ======================
+STAGES = ("decode", "to_dataframe", "normalize", "preprocess", "predict", "serialize")
+
+# seconds (Prometheus-style buckets)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# rows per request
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# Slow request = whole run() took longer than this (0 -> off)
+SLOW_REQUEST_MS = float(os.getenv("SCORE_SLOW_REQUEST_MS", "0"))
+# Fraction of requests that run under cProfile (0 -> profiler never starts)
+PROFILE_SAMPLE_RATE = float(os.getenv("SCORE_PROFILE_SAMPLE_RATE", "0"))
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name, labels=""):
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for le, c in zip(self.buckets, self.counts):
+            cumulative += c
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.9g}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class ScoringMetrics:
+    """
+    Per-stage latency histograms, batch sizes and error counters for run().
+    Thread-safe, so the local server can score requests concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stage_latency = {s: _Histogram(LATENCY_BUCKETS) for s in STAGES}
+            self.request_latency = _Histogram(LATENCY_BUCKETS)
+            self.batch_size = _Histogram(BATCH_BUCKETS)
+            self.requests_total = 0
+            self.rows_total = 0
+            self.errors_total = {s: 0 for s in STAGES}
+
+    def record(self, timings: dict, total: float, n_rows: int, error_stage=None):
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.stage_latency[stage].observe(seconds)
+            self.request_latency.observe(total)
+            self.requests_total += 1
+            if error_stage is None:
+                self.batch_size.observe(n_rows)
+                self.rows_total += n_rows
+            else:
+                self.errors_total[error_stage] += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            lines = [
+                "# HELP score_requests_total Number of run() calls.",
+                "# TYPE score_requests_total counter",
+                f"score_requests_total {self.requests_total}",
+                "# HELP score_rows_total Number of rows scored.",
+                "# TYPE score_rows_total counter",
+                f"score_rows_total {self.rows_total}",
+                "# HELP score_errors_total Failed run() calls by stage.",
+                "# TYPE score_errors_total counter",
+            ]
+            for stage, c in self.errors_total.items():
+                lines.append(f'score_errors_total{{stage="{stage}"}} {c}')
+
+            lines += [
+                "# HELP score_request_duration_seconds End-to-end run() latency.",
+                "# TYPE score_request_duration_seconds histogram",
+            ]
+            lines += self.request_latency.render("score_request_duration_seconds")
+
+            lines += [
+                "# HELP score_stage_duration_seconds run() latency per stage.",
+                "# TYPE score_stage_duration_seconds histogram",
+            ]
+            for stage, hist in self.stage_latency.items():
+                lines += hist.render("score_stage_duration_seconds", f'stage="{stage}"')
+
+            lines += [
+                "# HELP score_batch_size_rows Rows per successful request.",
+                "# TYPE score_batch_size_rows histogram",
+            ]
+            lines += self.batch_size.render("score_batch_size_rows")
+        return "\n".join(lines) + "\n"
+
+
+metrics = ScoringMetrics()
+
+
+def _default_slow_request_hook(timings: dict, total: float, profile_text):
+    parts = ", ".join(f"{k}={v * 1000:.2f}ms" for k, v in timings.items())
+    print(f"[score] slow request {total * 1000:.2f}ms ({parts})")
+    if profile_text:
+        print(profile_text)
+
+
+# Called as hook(timings, total_seconds, profile_text_or_None) for slow requests
+slow_request_hook = _default_slow_request_hook
+
+
+def set_slow_request_hook(hook):
+    """Replace the callback used for slow requests (None disables it)."""
+    global slow_request_hook
+    slow_request_hook = hook
+
+
+def metrics_text() -> str:
+    return metrics.render()
+
+
+# Only one cProfile can be active per process (Python 3.12+ raises ValueError
+# for a second one), so concurrent sampled requests take turns.
+_profile_lock = threading.Lock()
+
+
+def _start_profiler():
+    """Profiler for a sampled request; None if not sampled or another request is being profiled."""
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return None
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # some other profiling tool is already active in this process
+        _profile_lock.release()
+        return None
+    return profiler
+
+
+def _stop_profiler(profiler):
+    profiler.disable()
+    _profile_lock.release()
+
+
+def _registry_model_path():
+    """Model from registry/current.json (written by ml/pipeline.py), if there is one."""
+    registry_dir = os.getenv("MODEL_REGISTRY", "registry")
+    current = os.path.join(registry_dir, "current.json")
+    if not os.path.exists(current):
+        return None
+    with open(current, encoding="utf-8") as f:
+        return os.path.join(registry_dir, json.load(f)["model"])
+
 
 def init():
     """
@@ -13,16 +199,34 @@ def init():
     """
     global model
 
+    candidates = []
+
     # Azure standard: model is placed under AZUREML_MODEL_DIR (if you deploy from "model" asset)
-    model_dir = os.getenv("AZUREML_MODEL_DIR", ".")
-    model_path = os.path.join(model_dir, "car_price_pipeline.pkl")
+    model_dir = os.getenv("AZUREML_MODEL_DIR")
+    if model_dir:
+        candidates.append(os.path.join(model_dir, "car_price_pipeline.pkl"))
+
+    # Locally: latest model exported by ml/pipeline.py to the registry
+    registry_model = _registry_model_path()
+    if registry_model:
+        candidates.append(registry_model)
 
     # If you deploy by just including the file in the image, fallback to local path
-    if not os.path.exists(model_path):
-        model_path = "car_price_pipeline.pkl"
+    candidates.append("car_price_pipeline.pkl")
 
+    model_path = next((p for p in candidates if os.path.exists(p)), candidates[-1])
     model = joblib.load(model_path)
 
+    # run() sends canonical spellings ("Škoda", "Citroën"); a model trained on raw
+    # scraper strings would silently ignore them (handle_unknown="ignore")
+    stale = stale_categories(model)
+    if stale:
+        examples = "; ".join(f"{col}: {', '.join(map(repr, values[:5]))}" for col, values in stale.items())
+        raise RuntimeError(
+            f"{model_path} was trained before feature normalization ({examples}). "
+            "Retrain it with ml/train_model3.py or ml/pipeline.py and redeploy."
+        )
+
 
 def _to_dataframe(payload: dict) -> pd.DataFrame:
     """
@@ -59,33 +263,158 @@ def _to_dataframe(payload: dict) -> pd.DataFrame:
     return df
 
 
+def _lap(timings: dict, stage: str, t0: float) -> float:
+    now = time.perf_counter()
+    timings[stage] = now - t0
+    return now
+
+
 def run(raw_data):
     """
     Azure ML calls run() per request.
     raw_data is usually a JSON string.
     """
+    timings = {}
+    stage = "decode"
+    error_stage = None
+    n_rows = 0
+    profiler = None
+
+    t_start = t = time.perf_counter()
     try:
+        profiler = _start_profiler()
+
         if isinstance(raw_data, (bytes, bytearray)):
             raw_data = raw_data.decode("utf-8")
 
         # Azure usually passes JSON string; but sometimes already dict
         payload = json.loads(raw_data) if isinstance(raw_data, str) else raw_data
+        t = _lap(timings, stage, t)
 
+        stage = "to_dataframe"
         df = _to_dataframe(payload)
+        t = _lap(timings, stage, t)
+
+        # Same canonical Brand/Model/Transmission and Year -> Age as in training
+        stage = "normalize"
+        df = normalize_listings(df)
+        t = _lap(timings, stage, t)
 
-        # Predict
-        preds = model.predict(df)
+        # Predict (split preprocessor / estimator so each is timed on its own)
+        if hasattr(model, "steps") and len(model.steps) > 1:
+            stage = "preprocess"
+            X = model[:-1].transform(df)
+            t = _lap(timings, stage, t)
+
+            stage = "predict"
+            preds = model[-1].predict(X)
+        else:
+            stage = "predict"
+            preds = model.predict(df)
+        t = _lap(timings, stage, t)
 
         # Ensure JSON-serializable
+        stage = "serialize"
         preds = np.asarray(preds).astype(float).tolist()
+        n_rows = len(preds)
+        t = _lap(timings, stage, t)
 
         return {
             "predictions": preds,
-            "n_rows": len(preds)
+            "n_rows": n_rows
         }
 
     except Exception as e:
+        error_stage = stage
+        timings[stage] = time.perf_counter() - t
         # Return error in a clear JSON shape
         return {
             "error": str(e)
         }
+
+    finally:
+        total = time.perf_counter() - t_start
+        if profiler is not None:
+            _stop_profiler(profiler)
+        metrics.record(timings, total, n_rows, error_stage)
+
+        hook = slow_request_hook
+        if SLOW_REQUEST_MS > 0 and total * 1000 >= SLOW_REQUEST_MS and hook is not None:
+            # diagnostics must never replace the prediction / error dict run() returns
+            try:
+                profile_text = None
+                if profiler is not None:
+                    buf = io.StringIO()
+                    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(15)
+                    profile_text = buf.getvalue()
+                hook(timings, total, profile_text)
+            except Exception as e:
+                print(f"[score] slow request hook failed: {e!r}")
+
+
+# ======================
+# Local serving mode
+# ======================
+class _ScoreHandler(BaseHTTPRequestHandler):
+    """POST /score -> run(), GET /metrics -> Prometheus text, GET /health."""
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(200, metrics_text().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        elif self.path == "/health":
+            self._send(200, b"ok", "text/plain")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        if self.path not in ("/", "/score"):
+            self._send(404, b"not found", "text/plain")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # body can't be read at all -> counted as a decode error, like invalid JSON
+            metrics.record({"decode": 0.0}, 0.0, 0, error_stage="decode")
+            body = json.dumps({"error": "Invalid Content-Length header."}).encode("utf-8")
+            self._send(400, body, "application/json")
+            return
+
+        result = run(self.rfile.read(length))
+        status = 400 if "error" in result else 200
+        self._send(status, json.dumps(result).encode("utf-8"), "application/json")
+
+    def log_message(self, format, *args):
+        # bez ispisa po svakom requestu (load test bi zatrpao konzolu)
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 5001) -> ThreadingHTTPServer:
+    """Build the local scoring server (call init() first, then .serve_forever())."""
+    return ThreadingHTTPServer((host, port), _ScoreHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local scoring server (Azure ML init/run wrapper).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    init()
+    server = serve(args.host, args.port)
+    print(f"Scoring on http://{args.host}:{args.port}/score | metrics: /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,13 +1,20 @@
 import os
 import re
+import sys
 import time
 import random
-from datetime import datetime
 from urllib.parse import urljoin, urlparse
 
 import pandas as pd
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
 
+# zajednička normalizacija (ml/normalize.py); na path ide korijen repozitorija
+# (na kraj), a ne ml/, da pipeline/score2/... ne zasjene druge module
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from ml.normalize import normalize_listings, year_from_age
+
 # =========================
 # POSTAVKE
 # =========================
@@ -27,7 +34,7 @@ OUT_XLSX = "njuskalo_osijek_regija_auti_5000.xlsx"
 # Target + Features (BEZ goriva i BEZ potrošnje)
 COLUMNS = [
     "Price_market",  # target
-    "Age",
+    "Year",          # godina proizvodnje; Age se računa kad se podaci koriste
     "Mileage",
     "Brand",
     "Model",
@@ -50,6 +57,9 @@ LABEL_MAP = {
 
 NUMERIC_KEYS = {"year", "mileage_km", "power_kw"}
 
+# cijeli brojevi u CSV-u (nullable, da prazna polja ne pretvore stupac u float)
+INT_COLUMNS = ["Price_market", "Year", "Mileage", "Power_kW"]
+
 
 # =========================
 # HELPERI
@@ -149,12 +159,27 @@ def parse_label_value_pairs(page):
     return pairs
 
 
+def legacy_rows_to_year(df):
+    """
+    Stari CSV (prije Year) ima samo Age izračunat na dan scrapea;
+    Year = ova godina - Age (približno), Age se više ne sprema.
+    """
+    if "Age" not in df.columns:
+        return df
+    df = df.copy()
+    year = year_from_age(pd.to_numeric(df["Age"], errors="coerce"))
+    df["Year"] = df["Year"].fillna(year) if "Year" in df.columns else year
+    return df.drop(columns=["Age"])
+
+
 def autosave_csv(rows):
-    df = pd.DataFrame(rows)
+    df = legacy_rows_to_year(pd.DataFrame(rows))
     for c in COLUMNS:
         if c not in df.columns:
             df[c] = None
     df = df[COLUMNS].drop_duplicates(subset=["url"]).reset_index(drop=True)
+    df = normalize_listings(df, with_age=False)
+    df = df.astype({c: "Int64" for c in INT_COLUMNS})
     df.to_csv(OUT_CSV, index=False, encoding="utf-8")
     print(f"💾 Autosave: {len(df)} spremljeno -> {OUT_CSV}")
 
@@ -208,11 +233,9 @@ def build_row(page, url):
     if not transmission:
         return None
 
-    age = datetime.now().year - int(year)
-
     return {
         "Price_market": price,
-        "Age": age,
+        "Year": int(year),
         "Mileage": int(mileage),
         "Brand": brand,
         "Model": model,
@@ -233,7 +256,7 @@ def main():
     # resume ako već postoji CSV
     if os.path.exists(OUT_CSV):
         try:
-            df_old = pd.read_csv(OUT_CSV, encoding="utf-8")
+            df_old = legacy_rows_to_year(pd.read_csv(OUT_CSV, encoding="utf-8"))
             rows = df_old.to_dict("records")
             if "url" in df_old.columns:
                 seen = set(df_old["url"].dropna().astype(str).tolist())
@@ -1,11 +1,22 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import numpy as np
+
+from dataset import DatasetReloader, file_fingerprint, load_data, memory_footprint, registry_path
+from estimator import build_index, comparable_listings, estimate_price, make_engine
+from ml.normalize import stale_categories  # ml/ je na pathu preko dataset.py
+from options import build_options, slider_bounds, transmission_options
+from whatif import estimate_curve, predict_curve, value_grid
 
 # -----------------------------
 # CONFIG
 # -----------------------------
-DATA_PATH = "njuskalo_osijek_regija_auti_5000_2_fixed.csv"
+# Ako postoji registry (ml/pipeline.py), uzmi zadnju exportanu verziju
+DATA_PATH = registry_path("dataset", "njuskalo_osijek_regija_auti_5000_2_fixed.csv")
+
+# Istrenirani pipeline (ml/train_model3.py); ako ga nema, krivulje idu preko sličnih oglasa
+MODEL_PATH = registry_path("model", "car_price_pipeline.pkl")
 
 # Stavi svoj URL slike ovdje (može i Pinterest kao što si slala)
 HERO_IMAGE_URL = "https://i.pinimg.com/736x/62/97/b5/6297b51b69b4f0be703ee06da9fe7817.jpg"
@@ -136,42 +147,59 @@ label, .stMarkdown, .stTextLabelWrapper p {
 # -----------------------------
 # DATA
 # -----------------------------
-@st.cache_data
-def load_data(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-
-    # Normaliziraj nazive stupaca ako imaju razmake
-    df.columns = [c.strip() for c in df.columns]
-
-    # Očekivani stupci (prema tvom projektu)
-    # Price_market, Brand, Model, Transmission, Age, Mileage, Power_kW
-    # Ako neki nedostaje, probaj s varijantama
-    rename_map = {}
-    if "Power_kW" not in df.columns and "Power (kW)" in df.columns:
-        rename_map["Power (kW)"] = "Power_kW"
-    if "Price_market" not in df.columns and "Price" in df.columns:
-        rename_map["Price"] = "Price_market"
-    if rename_map:
-        df = df.rename(columns=rename_map)
-
-    # Trim stringova
-    for c in ["Brand", "Model", "Transmission"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.strip()
-
-    # Numerički
-    for c in ["Price_market", "Age", "Mileage", "Power_kW"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    # Drop rows bez ključnih polja
-    needed = [c for c in ["Price_market", "Brand", "Model", "Age", "Mileage", "Power_kW"] if c in df.columns]
-    df = df.dropna(subset=needed)
-
-    return df
-
-
-df = load_data(DATA_PATH)
+def build_dataset(path: str) -> dict:
+    # Tipizirani dataset + sve što se iz njega gradi (index, KD-tree, opcije), jednom po verziji
+    data = load_data(path)
+    index = build_index(data)
+    print(f"📦 Dataset {path}: {len(data)} redova, {memory_footprint(data) / 2**20:.1f} MB")
+    return {
+        "df": data,
+        "index": index,
+        "engine": make_engine(index),
+        "options": build_options(data),
+    }
+
+
+@st.cache_resource(max_entries=2)
+def dataset_reloader(path: str) -> DatasetReloader:
+    # Dijeli se između svih sesija (bez kopije po sesiji); nova verzija CSV-a se učita u pozadini
+    return DatasetReloader(path, build_dataset)
+
+
+@st.cache_resource(max_entries=2)
+def load_model(path: str, model_version: str):
+    # model_version (mtime + veličina) je dio ključa: ponovni trening u isti .pkl -> novi model bez restarta
+    import joblib
+    return joblib.load(path)
+
+
+def current_model(path: str):
+    """(pipeline, verzija); (None, None) ako modela nema ili se ne može učitati."""
+    if not os.path.exists(path):
+        return None, None
+    model_version = file_fingerprint(path)
+    try:
+        pipeline = load_model(path, model_version)
+        # model treniran prije normalizacije (npr. "Skoda", "VW") bi kanonske nazive iz dataseta tiho ignorirao
+        stale = stale_categories(pipeline)
+        if stale:
+            examples = "; ".join(f"{col}: {', '.join(values[:5])}" for col, values in stale.items())
+            raise ValueError(f"treniran prije normalizacije ({examples}), treba ga ponovno istrenirati")
+        return pipeline, model_version
+    except Exception as e:
+        print(f"⚠ Model {path} se ne može učitati: {e!r}")
+        st.warning(f"Model se ne može učitati ({e}); krivulje se računaju iz sličnih oglasa.")
+        return None, None
+
+
+reloader = dataset_reloader(DATA_PATH)
+data_version, dataset = reloader.current()
+if reloader.error is not None:
+    st.warning(f"Nova verzija dataseta se ne može učitati ({reloader.error}); koriste se prethodno učitani podaci.")
+df = dataset["df"]
+index = dataset["index"]
+engine = dataset["engine"]
+options = dataset["options"]
 
 # -----------------------------
 # HERO IMAGE
@@ -201,100 +229,41 @@ st.markdown('<div class="card">', unsafe_allow_html=True)
 col1, col2 = st.columns(2)
 
 # Brand / Model / Transmission iz dataseta (da se vrijednosti poklapaju i da ne bude "nema vozila")
-brands = sorted(df["Brand"].dropna().unique()) if "Brand" in df.columns else []
-default_brand = brands[0] if brands else ""
+# Sve iz cached option tree-a -> na rerunu samo lookup u dictu
+brands = options["brands"]
 
 with col1:
     brand = st.selectbox("Brand", brands, index=0 if brands else 0)
 
-    models = sorted(df[df["Brand"] == brand]["Model"].dropna().unique()) if "Model" in df.columns else []
+    models = options["models"].get(brand, [])
     model = st.selectbox("Model", models, index=0 if models else 0)
 
     # Transmission opcije iz dataseta; ako nema stupca, daj "N/A"
-    if "Transmission" in df.columns:
-        trans_vals = sorted(df[(df["Brand"] == brand) & (df["Model"] == model)]["Transmission"].dropna().unique())
-        if not trans_vals:
-            trans_vals = sorted(df["Transmission"].dropna().unique())
+    if options["has_transmission"]:
+        trans_vals = transmission_options(options, brand, model)
         transmission = st.selectbox("Mjenjač", trans_vals, index=0 if trans_vals else 0)
     else:
         transmission = "N/A"
         st.selectbox("Mjenjač", ["N/A"], index=0)
 
 with col2:
-    # Sigurni min/max za slidere
-    age_min = int(df["Age"].min()) if "Age" in df.columns else 0
-    age_max = int(df["Age"].max()) if "Age" in df.columns else 30
-    age_default = int(np.clip(np.median(df["Age"]), age_min, age_max)) if "Age" in df.columns else 5
+    # Sigurni min/max za slidere (default = medijan odabranog modela)
+    age_min, age_max, age_default = slider_bounds(options, brand, model, "Age")
     age = st.slider("Starost (godina)", age_min, age_max, age_default)
 
-    km_min = int(df["Mileage"].min()) if "Mileage" in df.columns else 0
-    km_max = int(df["Mileage"].max()) if "Mileage" in df.columns else 400_000
-    km_default = int(np.clip(np.median(df["Mileage"]), km_min, km_max)) if "Mileage" in df.columns else 150_000
+    km_min, km_max, km_default = slider_bounds(options, brand, model, "Mileage")
     km = st.slider("Kilometraža (km)", km_min, km_max, km_default)
 
-    kw_min = int(df["Power_kW"].min()) if "Power_kW" in df.columns else 40
-    kw_max = int(df["Power_kW"].max()) if "Power_kW" in df.columns else 250
-    kw_default = int(np.clip(np.median(df["Power_kW"]), kw_min, kw_max)) if "Power_kW" in df.columns else 90
+    kw_min, kw_max, kw_default = slider_bounds(options, brand, model, "Power_kW")
     power = st.slider("Snaga (kW)", kw_min, kw_max, kw_default)
 
 st.write("")
 
 # -----------------------------
-# ESTIMATION (robust fallback)
+# ESTIMATION (robust fallback, vidi estimator.py)
 # -----------------------------
-def estimate_price(data: pd.DataFrame, brand: str, model: str, transmission: str, age: int, km: int, power: int):
-    # 1) Pokušaj strogo: Brand+Model (+Transmission ako postoji)
-    base = data[(data["Brand"] == brand) & (data["Model"] == model)].copy()
-
-    if "Transmission" in data.columns and transmission != "N/A":
-        base_t = base[base["Transmission"] == transmission].copy()
-        if not base_t.empty:
-            base = base_t  # koristi ako ima pogodaka
-
-    # 2) Ako je i dalje premalo, uzmi najbližih K po numeričkoj udaljenosti (KNN-like)
-    # Normalizacija po rasponima da sve ima smisla
-    if base.empty:
-        base = data[data["Brand"] == brand].copy()  # barem isti brand kao fallback
-
-    if base.empty:
-        base = data.copy()
-
-    # Ako nema numeričkih stupaca, nema procjene
-    for c in ["Age", "Mileage", "Power_kW", "Price_market"]:
-        if c not in base.columns:
-            return None, None, 0
-
-    # Udaljenost
-    eps = 1e-9
-    age_range = (data["Age"].max() - data["Age"].min()) + eps
-    km_range = (data["Mileage"].max() - data["Mileage"].min()) + eps
-    kw_range = (data["Power_kW"].max() - data["Power_kW"].min()) + eps
-
-    d = (
-        ((base["Age"] - age).abs() / age_range)
-        + ((base["Mileage"] - km).abs() / km_range)
-        + ((base["Power_kW"] - power).abs() / kw_range)
-    )
-
-    base = base.assign(_dist=d).sort_values("_dist")
-
-    K = 50
-    top = base.head(K).copy()
-    n = int(len(top))
-
-    if n == 0:
-        return None, None, 0
-
-    median_price = float(top["Price_market"].median())
-
-    # raspon: manji ako ima dosta podataka, veći ako ih je malo
-    spread = 1000 if n >= 20 else 2500
-    lo, hi = median_price - spread, median_price + spread
-    return median_price, (lo, hi), n
-
-
 if st.button("Procijeni", type="primary"):
-    price, rng, n = estimate_price(df, brand, model, transmission, age, km, power)
+    price, rng, n = estimate_price(index, brand, model, transmission, age, km, power, engine)
 
     if price is None:
         st.error("Ne mogu izračunati procjenu (provjeri da dataset ima potrebne stupce).")
@@ -310,5 +279,57 @@ if st.button("Procijeni", type="primary"):
 
         st.caption(f"Procjena temeljena na ~{n} najsličnijih zapisa iz dataseta.")
 
+        with st.expander("Slični oglasi"):
+            similar = comparable_listings(index, df, brand, model, transmission, age, km, power, engine)
+            show_cols = [c for c in ["title", "Brand", "Model", "Transmission", "Age", "Mileage", "Power_kW", "Price_market", "url"] if c in similar.columns]
+            st.dataframe(
+                similar[show_cols],
+                hide_index=True,
+                column_config={"url": st.column_config.LinkColumn("Oglas")},
+            )
+
+# -----------------------------
+# ŠTO AKO? (cijela krivulja u jednom batchu, cache po kombinaciji unosa)
+# -----------------------------
+CURVE_FEATURES = {
+    "Kilometraža (km)": "Mileage",
+    "Starost (godina)": "Age",
+    "Snaga (kW)": "Power_kW",
+}
+
+
+@st.cache_data(max_entries=256)
+def price_curve(data_version: str, model_version, _pipeline, brand: str, model: str, transmission: str, age: int, km: int, power: int, vary: str):
+    """(krivulja, izvor, greška modela ili None); _pipeline se ne hashira, ključ je model_version."""
+    lo, hi, _ = options["bounds"][vary]
+    grid = value_grid(lo, hi)
+
+    error = None
+    if _pipeline is not None:
+        try:
+            prices = predict_curve(_pipeline, brand, model, transmission, age, km, power, vary, grid)
+            return pd.DataFrame({vary: grid, "Cijena (€)": prices}).set_index(vary), "model", None
+        except Exception as e:
+            # npr. stari .pkl s drugim stupcima -> slični oglasi, ali uz upozorenje
+            error = repr(e)
+            print(f"⚠ Krivulja iz modela nije uspjela: {error}")
+
+    prices = estimate_curve(index, brand, model, transmission, age, km, power, vary, grid, engine)
+    return pd.DataFrame({vary: grid, "Cijena (€)": prices}).set_index(vary), "oglasi", error
+
+
+if st.checkbox("Što ako? Prikaži kako se cijena mijenja"):
+    vary_label = st.selectbox("Mijenjaj", list(CURVE_FEATURES))
+    pipeline, model_version = current_model(MODEL_PATH)
+    curve, source, error = price_curve(data_version, model_version, pipeline, brand, model, transmission, age, km, power, CURVE_FEATURES[vary_label])
+
+    if error:
+        st.warning(f"Model ne može izračunati krivulju ({error}); prikazana je krivulja iz sličnih oglasa.")
+    st.line_chart(curve)
+    if source == "model":
+        st.caption("Krivulja iz istreniranog modela, ostale specifikacije fiksne.")
+    else:
+        st.caption("Krivulja iz medijana najsličnijih oglasa, ostale specifikacije fiksne.")
+
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -0,0 +1,162 @@
+# bench_estimator.py
+"""
+Latencija estimate_price: stara verzija (maske + sort nad DataFrameom) vs SegmentIndex
+(brute force s argpartition i KD-tree engine).
+
+    python web/bench_estimator.py               # 5k i 5M redova
+    python web/bench_estimator.py --rows 5000   # samo 5k
+
+Uz vrijeme provjerava i da obje verzije daju isti rezultat.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from estimator import build_index, estimate_price, make_engine
+
+BRANDS = [
+    "Volkswagen", "Opel", "Škoda", "Renault", "Peugeot", "Ford", "BMW", "Audi",
+    "Mercedes-Benz", "Citroën", "Fiat", "Toyota", "Hyundai", "Kia", "Seat",
+    "Dacia", "Mazda", "Nissan", "Volvo", "Honda", "Suzuki", "Mitsubishi",
+    "Chevrolet", "Alfa Romeo", "Mini", "Jeep", "Land Rover", "Lancia", "Smart",
+    "Subaru", "Porsche", "Jaguar", "Saab", "Lexus", "Dodge", "Chrysler",
+    "Cupra", "DS", "Tesla", "Infiniti",
+]
+TRANSMISSIONS = ["Mehanički mjenjač", "Automatski", "Polu-automatski"]
+
+
+def synthetic_listings(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Oglasi s Zipf-olikom raspodjelom marki/modela (kao na Njuškalu)."""
+    rng = np.random.default_rng(seed)
+
+    brand_p = 1.0 / np.arange(1, len(BRANDS) + 1) ** 1.1
+    brand_p /= brand_p.sum()
+    brand_idx = rng.choice(len(BRANDS), size=n_rows, p=brand_p)
+
+    # 3-25 modela po marki, također Zipf
+    n_models = rng.integers(3, 26, size=len(BRANDS))
+    u = rng.random(n_rows)
+    model_idx = np.minimum((n_models[brand_idx] * u ** 2).astype(int), n_models[brand_idx] - 1)
+    models = np.array([f"M{i}" for i in range(int(n_models.max()))], dtype=object)
+
+    age = rng.integers(0, 31, size=n_rows)
+    mileage = np.clip(age * 14_000 + rng.normal(0, 25_000, n_rows), 0, 600_000).astype(int)
+    power = rng.integers(40, 300, size=n_rows)
+    price = np.clip(30_000 * 0.88 ** age + power * 40 - mileage * 0.01 + rng.normal(0, 1500, n_rows), 500, None)
+
+    return pd.DataFrame({
+        "Price_market": price.round(),
+        "Brand": np.asarray(BRANDS, dtype=object)[brand_idx],
+        "Model": models[model_idx],
+        "Transmission": np.asarray(TRANSMISSIONS, dtype=object)[rng.choice(3, size=n_rows, p=[0.7, 0.25, 0.05])],
+        "Age": age,
+        "Mileage": mileage,
+        "Power_kW": power,
+    })
+
+
+def estimate_price_reference(data: pd.DataFrame, brand, model, transmission, age, km, power):
+    """Originalna implementacija iz web/app.py (stabilni sort da izjednačenja budu deterministična)."""
+    base = data[(data["Brand"] == brand) & (data["Model"] == model)].copy()
+    if "Transmission" in data.columns and transmission != "N/A":
+        base_t = base[base["Transmission"] == transmission].copy()
+        if not base_t.empty:
+            base = base_t
+    if base.empty:
+        base = data[data["Brand"] == brand].copy()
+    if base.empty:
+        base = data.copy()
+
+    eps = 1e-9
+    age_range = (data["Age"].max() - data["Age"].min()) + eps
+    km_range = (data["Mileage"].max() - data["Mileage"].min()) + eps
+    kw_range = (data["Power_kW"].max() - data["Power_kW"].min()) + eps
+    d = (
+        ((base["Age"] - age).abs() / age_range)
+        + ((base["Mileage"] - km).abs() / km_range)
+        + ((base["Power_kW"] - power).abs() / kw_range)
+    )
+    top = base.assign(_dist=d).sort_values("_dist", kind="stable").head(50)
+    n = int(len(top))
+    if n == 0:
+        return None, None, 0
+    median_price = float(top["Price_market"].median())
+    spread = 1000 if n >= 20 else 2500
+    return median_price, (median_price - spread, median_price + spread), n
+
+
+def queries(df: pd.DataFrame, n: int, seed: int = 1) -> list:
+    """Upiti iz postojećih segmenata + pokoji nepoznati model/marka."""
+    rng = np.random.default_rng(seed)
+    rows = df.sample(n=n, random_state=seed)
+    out = []
+    for i, r in enumerate(rows.itertuples(index=False)):
+        brand, model = r.Brand, r.Model
+        if i % 5 == 3:
+            model = "Nepoznati"
+        elif i % 5 == 4:
+            brand = "Nepoznata"
+        out.append((brand, model, r.Transmission, int(rng.integers(0, 31)),
+                    int(rng.integers(0, 400_000)), int(rng.integers(40, 300))))
+    return out
+
+
+def _time_calls(fn, qs) -> float:
+    t0 = time.perf_counter()
+    for q in qs:
+        fn(*q)
+    return (time.perf_counter() - t0) / len(qs) * 1000
+
+
+def bench(n_rows: int, n_queries: int) -> dict:
+    df = synthetic_listings(n_rows)
+    qs = queries(df, n_queries)
+
+    t0 = time.perf_counter()
+    index = build_index(df)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    tree = make_engine(index, "kdtree").warm()
+    tree_build_ms = (time.perf_counter() - t0) * 1000
+
+    mismatches = 0
+    for q in qs:
+        a = estimate_price_reference(df, *q)
+        for b in (estimate_price(index, *q), estimate_price(index, *q, engine=tree)):
+            if a[2] != b[2] or not np.isclose(a[0], b[0]):
+                mismatches += 1
+
+    return {
+        "rows": n_rows,
+        "queries": len(qs),
+        "build_index_ms": round(build_ms, 2),
+        "reference_ms": round(_time_calls(lambda *q: estimate_price_reference(df, *q), qs), 3),
+        "indexed_ms": round(_time_calls(lambda *q: estimate_price(index, *q), qs), 3),
+        "build_trees_ms": round(tree_build_ms, 2),
+        "kdtree_ms": round(_time_calls(lambda *q: estimate_price(index, *q, engine=tree), qs), 3),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark estimate_price (reference vs SegmentIndex).")
+    parser.add_argument("--rows", type=lambda s: [int(x) for x in s.split(",")], default=[5_000, 5_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        r = bench(n_rows, args.queries)
+        speedup = r["reference_ms"] / max(r["indexed_ms"], 1e-9)
+        print(
+            f"{r['rows']:>9,} redova | index build {r['build_index_ms']:>9.1f} ms | "
+            f"reference {r['reference_ms']:>8.3f} ms | indexed {r['indexed_ms']:>7.3f} ms | "
+            f"kdtree {r['kdtree_ms']:>7.3f} ms (build {r['build_trees_ms']:.0f} ms) | "
+            f"x{speedup:.1f} | razlike: {r['mismatches']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# benchmark.py
+"""
+Headless benchmark web estimatora (bez Streamlit servera) na sintetičkim oglasima.
+
+Za svaku veličinu dataseta mjeri load_data (CSV), build_options, build_index,
+izgradnju KD-tree enginea i estimate_price za čest, rijedak i nepoznat segment
+(brute force i KD-tree), uz vršnu memoriju svakog koraka. Rezultati idu u JSON.
+
+    python web/benchmark.py                                  # 5k, 50k, 500k, 5M
+    python web/benchmark.py --rows 5000,50000 --out bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench_estimator import synthetic_listings
+from dataset import load_data, memory_footprint
+from estimator import build_index, estimate_price, make_engine
+from options import build_options, slider_bounds, transmission_options
+
+DEFAULT_ROWS = [5_000, 50_000, 500_000, 5_000_000]
+
+
+def _timed(fn, repeat: int = 1):
+    """(rezultat, najbolje vrijeme u ms)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best * 1000
+
+
+def _peak_mb(fn) -> float:
+    """Vršna memorija (Python + NumPy alokacije) tijekom jednog poziva."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def _stage(fn, repeat: int = 1, memory: bool = True) -> tuple:
+    result, ms = _timed(fn, repeat)
+    out = {"ms": round(ms, 3)}
+    if memory:
+        out["peak_mb"] = round(_peak_mb(fn), 2)
+    return result, out
+
+
+def segment_queries(data) -> dict:
+    """Upiti za najčešći i najrjeđi Brand+Model te za nepoznatu marku."""
+    counts = data.groupby(["Brand", "Model", "Transmission"], observed=True).size()
+    common = counts.idxmax()
+    rare = counts.idxmin()
+    age, km, power = (int(np.median(data[c])) for c in ["Age", "Mileage", "Power_kW"])
+    return {
+        "common": (*common, age, km, power),
+        "rare": (*rare, age, km, power),
+        "unknown": ("Nepoznata", "Nepoznati", common[2], age, km, power),
+    }
+
+
+def bench_rows(n_rows: int, workdir: str, repeat: int) -> dict:
+    listings = synthetic_listings(n_rows)
+    listings["url"] = "https://www.njuskalo.hr/auti/oglas-" + listings.index.astype(str)
+    listings["title"] = listings["Brand"] + " " + listings["Model"]
+
+    path = os.path.join(workdir, f"listings_{n_rows}.csv")
+    listings.to_csv(path, index=False)
+    size_mb = os.path.getsize(path) / 2**20
+    del listings
+
+    stages = {}
+    data, stages["load_data"] = _stage(lambda: load_data(path))
+    options, stages["build_options"] = _stage(lambda: build_options(data))
+    index, stages["build_index"] = _stage(lambda: build_index(data))
+    tree, stages["build_kdtree"] = _stage(lambda: make_engine(index, "kdtree").warm(), memory=False)
+
+    # jedan rerun Streamlita: selectovi i slideri iz option tree-a
+    q = segment_queries(data)["common"]
+
+    def rerun_lookups():
+        options["models"].get(q[0], [])
+        transmission_options(options, q[0], q[1])
+        for c in ["Age", "Mileage", "Power_kW"]:
+            slider_bounds(options, q[0], q[1], c)
+
+    _, stages["option_lookups"] = _stage(rerun_lookups, repeat=max(repeat, 100), memory=False)
+
+    estimates = {}
+    for name, query in segment_queries(data).items():
+        _, brute = _stage(lambda: estimate_price(index, *query), repeat=repeat)
+        _, kdtree = _stage(lambda: estimate_price(index, *query, engine=tree), repeat=repeat, memory=False)
+        estimates[name] = {"segment": [str(v) for v in query[:3]], "brute": brute, "kdtree": kdtree}
+
+    os.remove(path)
+    return {
+        "rows": n_rows,
+        "csv_mb": round(size_mb, 2),
+        "dataframe_mb": round(memory_footprint(data) / 2**20, 2),
+        "segments": len(index.segments),
+        "stages": stages,
+        "estimate_price": estimates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the web estimator (headless).")
+    parser.add_argument("--rows", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=5, help="ponavljanja za estimate_price (najbolje vrijeme)")
+    parser.add_argument("--out", default="web_benchmark.json")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in args.rows:
+            r = bench_rows(n_rows, workdir, args.repeat)
+            results.append(r)
+
+            s = r["stages"]
+            e = r["estimate_price"]
+            print(
+                f"{n_rows:>9,} redova | load {s['load_data']['ms']:>9.1f} ms ({r['dataframe_mb']:.1f} MB) | "
+                f"options {s['build_options']['ms']:>8.1f} ms | index {s['build_index']['ms']:>8.1f} ms | "
+                f"estimate common/rare/unknown "
+                f"{e['common']['brute']['ms']:.2f}/{e['rare']['brute']['ms']:.2f}/{e['unknown']['brute']['ms']:.2f} ms "
+                f"(kdtree {e['common']['kdtree']['ms']:.2f}/{e['rare']['kdtree']['ms']:.2f}/{e['unknown']['kdtree']['ms']:.2f})"
+            )
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Rezultati spremljeni -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# dataset.py
+"""
+Učitavanje dataseta oglasa: samo potrebni stupci, kategorije umjesto stringova
+i najmanji cjelobrojni tipovi (CSV ili Parquet). Normalizacija je ista kao u
+treningu i scoringu (ml/normalize.py).
+
+DatasetReloader drži zadnju učitanu verziju i prati mtime/veličinu datoteke;
+kad scraper zapiše novi CSV, nova verzija se učita u pozadinskoj niti, a dotad
+app radi sa starom.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+# zajednička normalizacija (ml/normalize.py); na path ide korijen repozitorija
+# (na kraj), a ne ml/, da pipeline/score2/... ne zasjene druge module
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from ml.normalize import CAT_COLS, COLUMN_ALIASES, normalize_listings
+
+NUM_COLS = ["Price_market", "Age", "Mileage", "Power_kW"]
+# godina proizvodnje (novi scraper); Age se iz nje računa pri učitavanju
+YEAR_COL = "Year"
+# samo za prikaz sličnih oglasa (link na Njuškalo)
+DISPLAY_COLS = ["url", "title"]
+
+# Drop rows bez ključnih polja
+REQUIRED = ["Price_market", "Brand", "Model", "Age", "Mileage", "Power_kW"]
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _header(path: str) -> list:
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _resolve_columns(raw_cols: list, display: bool) -> dict:
+    """{ime u datoteci: naše ime} samo za stupce koje koristimo."""
+    stripped = {c.strip(): c for c in raw_cols}
+    wanted = CAT_COLS + NUM_COLS + [YEAR_COL] + (DISPLAY_COLS if display else [])
+
+    mapping = {}
+    for name in wanted:
+        if name in stripped:
+            mapping[stripped[name]] = name
+    for alias, name in COLUMN_ALIASES.items():
+        if name not in mapping.values() and alias in stripped:
+            mapping[stripped[alias]] = name
+    return mapping
+
+
+def _downcast(s: pd.Series) -> pd.Series:
+    """Najmanji int tip ako su sve vrijednosti cijeli brojevi, inače float64."""
+    values = s.to_numpy(dtype=float)
+    if len(values) and np.all(values == np.round(values)):
+        return pd.to_numeric(s, downcast="integer")
+    return s.astype(float)
+
+
+def load_data(path: str, display: bool = True) -> pd.DataFrame:
+    mapping = _resolve_columns(_header(path), display)
+
+    if _is_parquet(path):
+        df = pd.read_parquet(path, columns=list(mapping))
+    else:
+        dtypes = {raw: "category" for raw, name in mapping.items() if name in CAT_COLS}
+        dtypes.update({raw: str for raw, name in mapping.items() if name in DISPLAY_COLS})
+        df = pd.read_csv(path, usecols=list(mapping), dtype=dtypes)
+
+    df = df.rename(columns=mapping)
+
+    # kanonski Brand/Model/Transmission (nad kategorijama), brojevi, Age iz Year
+    df = normalize_listings(df, categorical=True)
+
+    needed = [c for c in REQUIRED if c in df.columns]
+    df = df.dropna(subset=needed)
+
+    for c in NUM_COLS:
+        if c in df.columns and not df[c].isna().any():
+            df[c] = _downcast(df[c])
+
+    for c in CAT_COLS:
+        if c in df.columns:
+            df[c] = df[c].cat.remove_unused_categories()
+
+    return df
+
+
+def registry_path(key: str, default: str, registry_dir: str = None) -> str:
+    """
+    Putanja artefakta ("dataset" / "model") iz registry/current.json koji piše
+    ml/pipeline.py; ako registryja nema, default.
+    """
+    registry_dir = registry_dir or os.getenv("MODEL_REGISTRY", "registry")
+    current = os.path.join(registry_dir, "current.json")
+    if not os.path.exists(current):
+        return default
+
+    with open(current, encoding="utf-8") as f:
+        rel = json.load(f).get(key)
+    return os.path.join(registry_dir, rel) if rel else default
+
+
+def memory_footprint(df: pd.DataFrame) -> int:
+    """Zauzeće memorije u bajtovima (uključujući stringove)."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def file_fingerprint(path: str, content_hash: bool = False) -> str:
+    """mtime + veličina (jeftino, za svaki rerun) ili SHA-1 sadržaja."""
+    if content_hash:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+class DatasetReloader:
+    """
+    loader(path) se pozove odmah, a poslije ponovno (u pozadinskoj niti) kad se
+    promijeni fingerprint datoteke. current() uvijek odmah vraća zadnju gotovu verziju.
+    """
+
+    def __init__(self, path: str, loader=load_data):
+        self.path = path
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._thread = None
+        self.error = None
+        # fingerprint datoteke koja se nije dala učitati (ne parsira se ponovno dok se ne promijeni)
+        self.failed_version = None
+
+        self.version = file_fingerprint(path)
+        self.value = loader(path)
+
+    def _reload(self, version: str):
+        try:
+            value = self.loader(self.path)
+            with self._lock:
+                self.value, self.version, self.error, self.failed_version = value, version, None, None
+        except Exception as e:
+            # npr. scraper upravo piše CSV -> ostaje stara verzija; novi pokušaj tek kad se datoteka opet promijeni
+            with self._lock:
+                self.error, self.failed_version = e, version
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def current(self):
+        """(version, value); pokrene pozadinsko učitavanje ako se datoteka promijenila."""
+        try:
+            latest = file_fingerprint(self.path)
+        except OSError:
+            latest = self.version
+
+        with self._lock:
+            if latest not in (self.version, self.failed_version) and self._thread is None:
+                self._thread = threading.Thread(target=self._reload, args=(latest,), daemon=True)
+                self._thread.start()
+            return self.version, self.value
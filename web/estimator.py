@@ -0,0 +1,288 @@
+# estimator.py
+"""
+Procjena cijene na temelju sličnih oglasa (bez Streamlita, da se može i benchmarkati).
+
+build_index() se radi jednom po učitavanju dataseta: redovi se stabilno sortiraju
+po (Brand, Model, Transmission) pa je svaki segment jedan kontinuirani raspon u
+NumPy poljima normaliziranih značajki i cijena. estimate_price() onda samo uzme
+raspon segmenta, a K najbližih traži neighbour engine: BruteForceEngine (argpartition
+umjesto punog sortiranja) ili TreeEngine (KD-tree/BallTree po segmentu, sub-linearno).
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.neighbors import BallTree, KDTree
+except ImportError:  # app radi i bez sklearna (brute force)
+    BallTree = KDTree = None
+
+NUM_COLS = ["Age", "Mileage", "Power_kW"]
+K = 50
+EPS = 1e-9
+
+
+class SegmentIndex:
+    """
+    X      -> (n, 3) normalizirane Age/Mileage/Power_kW (vrijednost / globalni raspon)
+    prices -> (n,) Price_market
+    pos    -> (n,) originalni redni broj retka (za deterministične izjednačene udaljenosti)
+    brands / models / segments -> slice u gornja polja za Brand, (Brand, Model),
+                                  (Brand, Model, Transmission)
+    """
+
+    def __init__(self, X, prices, pos, ranges, brands, models, segments, has_transmission):
+        self.X = X
+        self.prices = prices
+        self.pos = pos
+        self.ranges = ranges
+        self.brands = brands
+        self.models = models
+        self.segments = segments
+        self.has_transmission = has_transmission
+
+    def __len__(self):
+        return len(self.prices)
+
+
+def _group_slices(keys: list, boundaries: np.ndarray) -> dict:
+    starts = boundaries[:-1]
+    stops = boundaries[1:]
+    return {k: slice(int(a), int(b)) for k, a, b in zip(keys, starts, stops)}
+
+
+def _slices_for(codes: list, uniques: list, n: int) -> dict:
+    """Kontinuirani rasponi za grupe zadane (već sortiranim) kodovima stupaca."""
+    if n == 0:
+        return {}
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for c in codes:
+        change[1:] |= c[1:] != c[:-1]
+    starts = np.flatnonzero(change)
+    boundaries = np.append(starts, n)
+
+    keys = []
+    for s in starts:
+        key = tuple(u[c[s]] for u, c in zip(uniques, codes))
+        keys.append(key[0] if len(key) == 1 else key)
+    return _group_slices(keys, boundaries)
+
+
+def build_index(data: pd.DataFrame):
+    """Index za estimate_price (None ako dataset nema potrebne stupce)."""
+    for c in NUM_COLS + ["Price_market", "Brand", "Model"]:
+        if c not in data.columns:
+            return None
+
+    has_transmission = "Transmission" in data.columns
+    key_cols = ["Brand", "Model"] + (["Transmission"] if has_transmission else [])
+
+    factorized = [pd.factorize(data[c], use_na_sentinel=False) for c in key_cols]
+    codes = [np.asarray(f[0]) for f in factorized]
+    uniques = [np.asarray(f[1], dtype=object) for f in factorized]
+
+    # np.lexsort: zadnji ključ je primarni; stabilno -> unutar segmenta ostaje redoslijed iz dataseta
+    order = np.lexsort(codes[::-1])
+    codes = [c[order] for c in codes]
+
+    ranges = np.array(
+        [float(data[c].max()) - float(data[c].min()) + EPS for c in NUM_COLS],
+        dtype=float,
+    )
+    X = np.ascontiguousarray(data[NUM_COLS].to_numpy(dtype=float)[order] / ranges)
+    prices = np.ascontiguousarray(data["Price_market"].to_numpy(dtype=float)[order])
+
+    n = len(order)
+    brands = _slices_for(codes[:1], uniques[:1], n)
+    models = _slices_for(codes[:2], uniques[:2], n)
+    segments = _slices_for(codes, uniques, n) if has_transmission else {}
+
+    return SegmentIndex(X, prices, order, ranges, brands, models, segments, has_transmission)
+
+
+def _k_nearest(d: np.ndarray, pos: np.ndarray, k: int) -> np.ndarray:
+    """Indeksi k najmanjih udaljenosti; izjednačene na granici po redu u datasetu."""
+    if len(d) <= k:
+        return np.arange(len(d))
+
+    kth = d[np.argpartition(d, k - 1)[:k]].max()
+    closer = np.flatnonzero(d < kth)
+    ties = np.flatnonzero(d == kth)
+    need = k - len(closer)
+    if len(ties) > need:
+        ties = ties[np.argsort(pos[ties], kind="stable")[:need]]
+    return np.concatenate([closer, ties])
+
+
+def segment_slice(index: SegmentIndex, brand: str, model: str, transmission: str) -> slice:
+    """Isti fallback kao prije: Brand+Model(+Transmission) -> Brand -> cijeli dataset."""
+    sl = index.models.get((brand, model))
+
+    if sl is not None and index.has_transmission and transmission != "N/A":
+        sl_t = index.segments.get((brand, model, transmission))
+        if sl_t is not None:
+            sl = sl_t  # koristi ako ima pogodaka
+
+    if sl is None:
+        sl = index.brands.get(brand)  # barem isti brand kao fallback
+
+    if sl is None:
+        sl = slice(0, len(index))
+
+    return sl
+
+
+class BruteForceEngine:
+    """L1 udaljenost do svih redova segmenta + argpartition (linearno u veličini segmenta)."""
+
+    def __init__(self, index: SegmentIndex):
+        self.index = index
+
+    def query(self, sl: slice, q: np.ndarray, k: int) -> np.ndarray:
+        """Pozicije (relativne na sl) k najbližih redova upitu q (normaliziran)."""
+        d = np.abs(self.index.X[sl] - q).sum(axis=1)
+        return _k_nearest(d, self.index.pos[sl], k)
+
+    def query_many(self, sl: slice, Q: np.ndarray, k: int) -> list:
+        """
+        Kao query(), ali za više upita odjednom (Q je (m, 3)); vraća listu polja.
+        Dimenzije koje su iste u svim upitima (npr. sve osim Mileage u "što ako?" krivulji)
+        računaju se samo jednom.
+        """
+        X = self.index.X[sl]
+        pos = self.index.pos[sl]
+        if len(Q) == 0:
+            return []
+
+        fixed = np.all(Q == Q[0], axis=0)
+        parts = [np.abs(X[:, j] - Q[0, j]) if fixed[j] else None for j in range(X.shape[1])]
+
+        out = []
+        for q in Q:
+            # isti redoslijed zbrajanja kao u query() -> iste udaljenosti i izjednačenja
+            d = None
+            for j, part in enumerate(parts):
+                if part is None:
+                    part = np.abs(X[:, j] - q[j])
+                d = part if d is None else d + part
+            out.append(_k_nearest(d, pos, k))
+        return out
+
+
+class TreeEngine(BruteForceEngine):
+    """
+    KD-tree / BallTree po segmentu (i za globalni fallback), gradi se lijeno pri prvom upitu.
+    Stablo vrati k-tu udaljenost, a kandidati unutar tog radijusa se ponovno rangiraju
+    kao u BruteForceEngine, pa su rezultati (i izjednačenja) isti.
+    """
+
+    # manje segmente je brže proći direktno nego graditi stablo
+    MIN_TREE_ROWS = 512
+
+    def __init__(self, index: SegmentIndex, tree_cls=None, leaf_size: int = 40):
+        super().__init__(index)
+        self.tree_cls = tree_cls or KDTree
+        self.leaf_size = leaf_size
+        self._trees = {}
+
+    def _tree(self, sl: slice):
+        key = (sl.start, sl.stop)
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = self.tree_cls(self.index.X[sl], leaf_size=self.leaf_size, metric="manhattan")
+            self._trees[key] = tree
+        return tree
+
+    def query(self, sl: slice, q: np.ndarray, k: int) -> np.ndarray:
+        if sl.stop - sl.start <= max(k, self.MIN_TREE_ROWS):
+            return super().query(sl, q, k)
+
+        tree = self._tree(sl)
+        dist, _ = tree.query(q[None, :], k=k)
+        kth = float(dist[0, -1])
+        cand = tree.query_radius(q[None, :], r=kth * (1 + 1e-9) + 1e-12)[0]
+
+        d = np.abs(self.index.X[sl][cand] - q).sum(axis=1)
+        return cand[_k_nearest(d, self.index.pos[sl][cand], k)]
+
+    def query_many(self, sl: slice, Q: np.ndarray, k: int) -> list:
+        if sl.stop - sl.start <= max(k, self.MIN_TREE_ROWS):
+            return super().query_many(sl, Q, k)
+
+        tree = self._tree(sl)
+        dist, _ = tree.query(Q, k=k)
+        cands = tree.query_radius(Q, r=dist[:, -1] * (1 + 1e-9) + 1e-12)
+
+        X = self.index.X[sl]
+        pos = self.index.pos[sl]
+        out = []
+        for q, cand in zip(Q, cands):
+            d = np.abs(X[cand] - q).sum(axis=1)
+            out.append(cand[_k_nearest(d, pos[cand], k)])
+        return out
+
+    def warm(self):
+        """Izgradi sva stabla odmah (inače se grade pri prvom upitu na segment)."""
+        n = len(self.index)
+        for sl in [slice(0, n), *self.index.brands.values(), *self.index.models.values(), *self.index.segments.values()]:
+            if sl.stop - sl.start > self.MIN_TREE_ROWS:
+                self._tree(sl)
+        return self
+
+
+ENGINES = {
+    "brute": lambda index: BruteForceEngine(index),
+    "kdtree": lambda index: TreeEngine(index, KDTree),
+    "balltree": lambda index: TreeEngine(index, BallTree),
+}
+
+
+def make_engine(index: SegmentIndex, kind: str = "kdtree"):
+    """Neighbour engine za index; bez sklearna uvijek brute force."""
+    if index is None:
+        return None
+    if KDTree is None:
+        kind = "brute"
+    return ENGINES[kind](index)
+
+
+def nearest(index: SegmentIndex, brand: str, model: str, transmission: str, age: int, km: int, power: int, engine=None):
+    """Pozicije (u poljima indexa) K najsličnijih oglasa i njihove udaljenosti."""
+    sl = segment_slice(index, brand, model, transmission)
+    q = np.array([age, km, power], dtype=float) / index.ranges
+
+    engine = engine or BruteForceEngine(index)
+    rows = sl.start + engine.query(sl, q, K)
+    dist = np.abs(index.X[rows] - q).sum(axis=1)
+
+    order = np.lexsort((index.pos[rows], dist))
+    return rows[order], dist[order]
+
+
+def estimate_price(index: SegmentIndex, brand: str, model: str, transmission: str, age: int, km: int, power: int, engine=None):
+    # Ako nema numeričkih stupaca, nema procjene
+    if index is None:
+        return None, None, 0
+
+    # KNN-like: L1 udaljenost u prostoru normaliziranom po globalnim rasponima
+    rows, _ = nearest(index, brand, model, transmission, age, km, power, engine)
+    n = int(len(rows))
+
+    if n == 0:
+        return None, None, 0
+
+    median_price = float(np.median(index.prices[rows]))
+
+    # raspon: manji ako ima dosta podataka, veći ako ih je malo
+    spread = 1000 if n >= 20 else 2500
+    lo, hi = median_price - spread, median_price + spread
+    return median_price, (lo, hi), n
+
+
+def comparable_listings(index: SegmentIndex, data: pd.DataFrame, brand: str, model: str, transmission: str, age: int, km: int, power: int, engine=None) -> pd.DataFrame:
+    """Oglasi na kojima se temelji procjena (najbliži prvi), s udaljenošću u stupcu _dist."""
+    if index is None:
+        return data.iloc[0:0]
+
+    rows, dist = nearest(index, brand, model, transmission, age, km, power, engine)
+    return data.iloc[index.pos[rows]].assign(_dist=dist)
@@ -0,0 +1,96 @@
+# options.py
+"""
+Opcije za Brand -> Model -> Mjenjač selectove i granice slidera.
+
+Streamlit na svaku promjenu widgeta ponovno izvrti cijelu skriptu, pa se sve ovo
+računa jednom po datasetu (build_options) i u app.py drži u st.cache_resource.
+Na rerunu su onda samo lookupovi u dictu, bez filtriranja DataFramea.
+"""
+import numpy as np
+import pandas as pd
+
+# (stupac, default min, default max, default vrijednost) ako stupac ne postoji
+SLIDER_DEFAULTS = {
+    "Age": (0, 30, 5),
+    "Mileage": (0, 400_000, 150_000),
+    "Power_kW": (40, 250, 90),
+}
+
+
+def _bounds(lo, hi, median) -> tuple:
+    lo, hi = int(lo), int(hi)
+    return lo, hi, int(np.clip(median, lo, hi))
+
+
+def build_options(data: pd.DataFrame) -> dict:
+    """
+    {
+      "brands": [...],
+      "models": {brand: [...]},
+      "transmissions": {(brand, model): [...]},   # prazno ako nema stupca Transmission
+      "all_transmissions": [...],
+      "has_transmission": bool,
+      "bounds": {"Age": (min, max, median), ...},                 # globalno
+      "segment_bounds": {(brand, model): {"Age": (min, max, median), ...}},
+    }
+    """
+    has_model = "Brand" in data.columns and "Model" in data.columns
+    has_transmission = "Transmission" in data.columns
+    num_cols = [c for c in SLIDER_DEFAULTS if c in data.columns]
+
+    brands = sorted(data["Brand"].dropna().unique()) if "Brand" in data.columns else []
+
+    models = {}
+    segment_bounds = {}
+    if has_model:
+        grouped = data.groupby(["Brand", "Model"], observed=True, sort=False)
+        for brand, model in grouped.size().index:
+            models.setdefault(brand, []).append(model)
+        models = {b: sorted(m) for b, m in models.items()}
+
+        if num_cols:
+            stats = grouped[num_cols].agg(["min", "max", "median"])
+            for key, row in zip(stats.index, stats.itertuples(index=False)):
+                values = iter(row)
+                segment_bounds[key] = {c: _bounds(next(values), next(values), next(values)) for c in num_cols}
+
+    transmissions = {}
+    all_transmissions = []
+    if has_transmission:
+        all_transmissions = sorted(data["Transmission"].dropna().unique())
+        if has_model:
+            counts = data.groupby(["Brand", "Model", "Transmission"], observed=True, sort=False).size()
+            for brand, model, trans in counts.index:
+                transmissions.setdefault((brand, model), []).append(trans)
+            transmissions = {k: sorted(v) for k, v in transmissions.items()}
+
+    bounds = {}
+    for c, default in SLIDER_DEFAULTS.items():
+        if c in num_cols:
+            bounds[c] = _bounds(data[c].min(), data[c].max(), np.median(data[c]))
+        else:
+            bounds[c] = default
+
+    return {
+        "brands": brands,
+        "models": models,
+        "transmissions": transmissions,
+        "all_transmissions": all_transmissions,
+        "has_transmission": has_transmission,
+        "bounds": bounds,
+        "segment_bounds": segment_bounds,
+    }
+
+
+def transmission_options(options: dict, brand: str, model: str) -> list:
+    """Mjenjači za Brand+Model; ako ih nema, svi iz dataseta (kao prije)."""
+    return options["transmissions"].get((brand, model)) or options["all_transmissions"]
+
+
+def slider_bounds(options: dict, brand: str, model: str, col: str) -> tuple:
+    """(min, max, default): raspon je globalni, a default medijan odabranog modela."""
+    lo, hi, default = options["bounds"][col]
+    seg = options["segment_bounds"].get((brand, model), {}).get(col)
+    if seg is not None:
+        default = int(np.clip(seg[2], lo, hi))
+    return lo, hi, default
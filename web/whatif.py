@@ -0,0 +1,55 @@
+# whatif.py
+"""
+"Što ako?" krivulje: procijenjena cijena preko mreže vrijednosti jedne značajke
+(Mileage / Age / Power_kW), dok su ostale fiksne.
+
+Cijela krivulja je jedan batch: ili jedan model.predict() nad svim točkama
+(car_price_pipeline.pkl), ili jedan batch upit neighbour engineu.
+"""
+import numpy as np
+import pandas as pd
+
+from estimator import BruteForceEngine, K, NUM_COLS, segment_slice
+
+CURVE_POINTS = 50
+
+
+def value_grid(lo: float, hi: float, points: int = CURVE_POINTS) -> np.ndarray:
+    """Cjelobrojna mreža od lo do hi (bez duplikata kad je raspon mali)."""
+    return np.unique(np.linspace(lo, hi, points).round().astype(int))
+
+
+def _inputs(age: int, km: int, power: int) -> dict:
+    return {"Age": age, "Mileage": km, "Power_kW": power}
+
+
+def predict_curve(pipeline, brand: str, model: str, transmission: str, age: int, km: int, power: int, vary: str, grid: np.ndarray) -> np.ndarray:
+    """Jedan pipeline.predict() za sve točke mreže."""
+    row = {"Brand": brand, "Model": model, "Transmission": transmission, **_inputs(age, km, power)}
+    batch = pd.DataFrame([row] * len(grid))
+    batch[vary] = grid
+
+    # model očekuje iste stupce kao na treningu (ostali -> NaN, riješi imputer)
+    cols = list(getattr(pipeline, "feature_names_in_", batch.columns))
+    batch = batch.reindex(columns=cols)
+
+    return np.asarray(pipeline.predict(batch), dtype=float)
+
+
+def estimate_curve(index, brand: str, model: str, transmission: str, age: int, km: int, power: int, vary: str, grid: np.ndarray, engine=None) -> np.ndarray:
+    """Medijan K najsličnijih oglasa za svaku točku mreže (jedan batch upit)."""
+    if index is None:
+        return np.full(len(grid), np.nan)
+
+    sl = segment_slice(index, brand, model, transmission)
+
+    Q = np.tile(np.array([age, km, power], dtype=float), (len(grid), 1))
+    Q[:, NUM_COLS.index(vary)] = grid
+    Q /= index.ranges
+
+    engine = engine or BruteForceEngine(index)
+    prices = index.prices[sl]
+    return np.array([
+        np.median(prices[rows]) if len(rows) else np.nan
+        for rows in engine.query_many(sl, Q, K)
+    ])